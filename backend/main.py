@@ -2,18 +2,31 @@ import os
 import re
 import json
 import uuid
+import hashlib
 import logging
+import time
+import functools
+import threading
 import asyncio
 import subprocess
 import tempfile
 from pathlib import Path
+from datetime import datetime
 from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Query, UploadFile, File, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from pydantic import BaseModel
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
-from sqlalchemy import create_engine, Column, String, Text, DateTime, func
-from sqlalchemy.orm import sessionmaker, Session, declarative_base
+from cachetools import TTLCache, cached
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+from sqlalchemy import create_engine, select, union, insert, update, or_, case, text, Column, String, Text, DateTime, Index, func
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker, Session, declarative_base, load_only
+from sqlalchemy.pool import NullPool
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -26,15 +39,42 @@ if not DATABASE_URL:
     _p = os.getenv("POSTGRES_PASSWORD", "password")
     _d = os.getenv("POSTGRES_DB", "recruiter_db")
     DATABASE_URL = f"postgresql://{_u}:{_p}@db:5432/{_d}"
-engine = create_engine(DATABASE_URL)
+# Pool sizing: one connection budget split between the two engines (at most 30 per
+# process, so a couple of workers stay well under Postgres' default max_connections=100).
+# Most routes (/dashboard, /jobs, the /application poll) are sync threadpool routes, so the
+# sync engine gets the larger share (20, above SQLAlchemy's old 5+10 default); the async
+# routes release their connection before LLM calls and make do with 10. Wait at most 30s
+# for a connection, and pre-ping/recycle to drop connections killed by a DB restart.
+# Behind PgBouncer (port 6432) it does the pooling.
+_BEHIND_PGBOUNCER = make_url(DATABASE_URL).port == 6432
+_POOL_COMMON = {"pool_timeout": 30, "pool_pre_ping": True, "pool_recycle": 3600}
+if _BEHIND_PGBOUNCER:
+    _SYNC_POOL_KWARGS = _ASYNC_POOL_KWARGS = {"poolclass": NullPool}
+else:
+    _SYNC_POOL_KWARGS = {"pool_size": 15, "max_overflow": 5, **_POOL_COMMON}
+    _ASYNC_POOL_KWARGS = {"pool_size": 5, "max_overflow": 5, **_POOL_COMMON}
+engine = create_engine(DATABASE_URL, **_SYNC_POOL_KWARGS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# async engine for the `async def` routes, so DB roundtrips don't block the event loop.
+# PgBouncer in transaction mode can't track asyncpg's prepared statements, so disable them.
+async_engine = create_async_engine(
+    make_url(DATABASE_URL).set(drivername="postgresql+asyncpg"),
+    connect_args=(
+        {"statement_cache_size": 0, "prepared_statement_cache_size": 0} if _BEHIND_PGBOUNCER else {}
+    ),
+    **_ASYNC_POOL_KWARGS,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 
 # ── Models ──────────────────────────────────────────────────
+_GEN_UUID = text("gen_random_uuid()::text")  # ids generated by Postgres, returned via RETURNING
+
+
 class User(Base):
     __tablename__ = "users"
-    id = Column(String, primary_key=True)
+    id = Column(String, primary_key=True, server_default=_GEN_UUID)
     name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False, index=True)
     role = Column(String, nullable=False, default="user")  # user | hr
@@ -47,7 +87,7 @@ class User(Base):
     linkedin = Column(String, default="")
     github = Column(String, default="")
     portfolio = Column(String, default="")
-    skills = Column(Text, default="[]")  # JSON array
+    skills = Column(JSONB, default=list)  # list of strings
     experience = Column(Text, default="")
     education = Column(Text, default="")
     resume_text = Column(Text, default="")  # plain text resume for AI
@@ -60,8 +100,8 @@ class User(Base):
 
 class Application(Base):
     __tablename__ = "applications"
-    id = Column(String, primary_key=True)
-    user_id = Column(String, index=True)
+    id = Column(String, primary_key=True, server_default=_GEN_UUID)
+    user_id = Column(String)  # indexed via the composites below
     job_id = Column(String)
     job_title = Column(String)
     description = Column(Text)
@@ -70,13 +110,23 @@ class Application(Base):
     notes = Column(Text, default="")  # user's personal notes
     created_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_app_user_job", "user_id", "job_id"),
+        Index("ix_app_user_created", "user_id", created_at.desc()),  # dashboard order
+        Index("ix_app_job_status_created", "job_id", "status", created_at.desc()),  # HR applicants list
+    )
+
 
 class SwipedLeft(Base):
     __tablename__ = "swiped_left"
-    id = Column(String, primary_key=True)
-    user_id = Column(String, index=True)
+    id = Column(String, primary_key=True, server_default=_GEN_UUID)
+    user_id = Column(String)  # indexed via ix_swiped_left_user_job
     job_id = Column(String)
 
+    __table_args__ = (
+        Index("ix_swiped_left_user_job", "user_id", "job_id"),
+    )
+
 
 class HRJob(Base):
     """Jobs posted by HR users from within Kanso."""
@@ -91,7 +141,7 @@ class HRJob(Base):
     salary = Column(String, default="")
     summary = Column(Text, default="")
     description = Column(Text, default="")
-    tags = Column(Text, default="[]")  # JSON array stored as text
+    tags = Column(JSONB, default=list)  # list of strings
     created_at = Column(DateTime, server_default=func.now())
 
 
@@ -102,7 +152,7 @@ class HRPersonality(Base):
     company = Column(String, index=True)
     hr_name = Column(String)
     style = Column(Text)  # Personality description used as system prompt
-    common_questions = Column(Text, default="[]")  # JSON array of typical questions
+    common_questions = Column(JSONB, default=list)  # typical questions
     tone = Column(String, default="professional")  # casual | professional | formal
     created_at = Column(DateTime, server_default=func.now())
 
@@ -110,23 +160,27 @@ class HRPersonality(Base):
 class ChatMessage(Base):
     """Chat history for AI-HR conversations (per application)."""
     __tablename__ = "chat_messages"
-    id = Column(String, primary_key=True)
-    application_id = Column(String, index=True)
+    id = Column(String, primary_key=True, server_default=_GEN_UUID)
+    application_id = Column(String)  # indexed via ix_chat_app_created
     role = Column(String)  # user | assistant
     content = Column(Text)
     created_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_chat_app_created", "application_id", "created_at"),
+    )
+
 
 class InterviewFeedback(Base):
     """AI-generated feedback after a practice interview."""
     __tablename__ = "interview_feedback"
-    id = Column(String, primary_key=True)
+    id = Column(String, primary_key=True, server_default=_GEN_UUID)
     application_id = Column(String, index=True)
     user_id = Column(String, index=True)
     score = Column(String, default="")           # e.g. "7/10"
     summary = Column(Text, default="")           # overall summary
-    strengths = Column(Text, default="[]")       # JSON array
-    improvements = Column(Text, default="[]")    # JSON array
+    strengths = Column(JSONB, default=list)      # list of strings
+    improvements = Column(JSONB, default=list)   # list of strings
     transcript = Column(Text, default="")        # interview transcript
     duration_seconds = Column(String, default="0")
     created_at = Column(DateTime, server_default=func.now())
@@ -135,23 +189,24 @@ class InterviewFeedback(Base):
 class Notification(Base):
     """In-app notifications for users."""
     __tablename__ = "notifications"
-    id = Column(String, primary_key=True)
-    user_id = Column(String, index=True)
+    id = Column(String, primary_key=True, server_default=_GEN_UUID)
+    user_id = Column(String)  # indexed via ix_notif_user_created
     title = Column(String)
     body = Column(Text, default="")
     link_page = Column(String, default="")  # page to navigate to: feed | dashboard | prep
     read = Column(String, default="false")  # "true" | "false"
     created_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_notif_user_created", "user_id", created_at.desc()),
+    )
+
 
 Base.metadata.create_all(bind=engine)
 
 # ── Auto-add new columns (dev convenience, no alembic needed) ─
 def _safe_add_columns():
-    """Add new columns if they don't exist — idempotent."""
-    from sqlalchemy import inspect as sa_inspect, text
-    insp = sa_inspect(engine)
-    user_cols = {c["name"] for c in insp.get_columns("users")}
+    """Add new columns/indexes if they don't exist — idempotent, one transaction."""
     new_user_cols = {
         "headline": "VARCHAR DEFAULT ''",
         "bio": "TEXT DEFAULT ''",
@@ -160,7 +215,7 @@ def _safe_add_columns():
         "linkedin": "VARCHAR DEFAULT ''",
         "github": "VARCHAR DEFAULT ''",
         "portfolio": "VARCHAR DEFAULT ''",
-        "skills": "TEXT DEFAULT '[]'",
+        "skills": "JSONB DEFAULT '[]'",
         "experience": "TEXT DEFAULT ''",
         "education": "TEXT DEFAULT ''",
         "resume_text": "TEXT DEFAULT ''",
@@ -169,35 +224,85 @@ def _safe_add_columns():
         "company_role": "VARCHAR DEFAULT ''",
         "company_desc": "TEXT DEFAULT ''",
     }
-    with engine.begin() as conn:
-        for col, typedef in new_user_cols.items():
-            if col not in user_cols:
-                conn.execute(text(f'ALTER TABLE users ADD COLUMN "{col}" {typedef}'))
-                logger.info("Added column users.%s", col)
     # Application columns
-    app_cols = {c["name"] for c in insp.get_columns("applications")}
     new_app_cols = {
         "notes": "TEXT DEFAULT ''",
     }
     with engine.begin() as conn:
-        for col, typedef in new_app_cols.items():
-            if col not in app_cols:
-                conn.execute(text(f'ALTER TABLE applications ADD COLUMN "{col}" {typedef}'))
-                logger.info("Added column applications.%s", col)
+        columns = conn.execute(text(
+            "SELECT table_name, column_name, data_type, column_default FROM information_schema.columns "
+            "WHERE table_schema = current_schema()"
+        )).all()
+        existing = {(r.table_name, r.column_name) for r in columns}
+        # One ALTER per table, and only for missing columns: ALTER TABLE takes ACCESS EXCLUSIVE
+        # even when IF NOT EXISTS makes it a no-op, and this runs on every (re)load
+        for table, cols in (("users", new_user_cols), ("applications", new_app_cols)):
+            missing = {c: t for c, t in cols.items() if (table, c) not in existing}
+            if missing:
+                clauses = ", ".join(f'ADD COLUMN IF NOT EXISTS "{c}" {t}' for c, t in missing.items())
+                conn.execute(text(f"ALTER TABLE {table} {clauses}"))
+                logger.info("Added columns to %s: %s", table, ", ".join(missing))
+        # JSON arrays used to be stored as TEXT — convert in place (once)
+        json_cols = {
+            ("users", "skills"), ("hr_jobs", "tags"), ("hr_personalities", "common_questions"),
+            ("interview_feedback", "strengths"), ("interview_feedback", "improvements"),
+        }
+        text_cols = {(r.table_name, r.column_name) for r in columns if r.data_type == "text"}
+        for table, col in json_cols & text_cols:
+            # Savepoint per column: one legacy value that isn't valid JSON leaves that column
+            # as TEXT instead of rolling back the rest of the migration
+            try:
+                with conn.begin_nested():
+                    conn.execute(text(
+                        f'ALTER TABLE {table} ALTER COLUMN "{col}" DROP DEFAULT, '
+                        f'ALTER COLUMN "{col}" TYPE JSONB USING COALESCE(NULLIF("{col}", \'\'), \'[]\')::jsonb, '
+                        f'ALTER COLUMN "{col}" SET DEFAULT \'[]\'::jsonb'
+                    ))
+                logger.info("Converted %s.%s to JSONB", table, col)
+            except Exception as e:
+                logger.error("Could not convert %s.%s to JSONB, fix its invalid values: %s", table, col, e)
+        # Tables created before ids moved server-side have no default on id
+        no_id_default = {r.table_name for r in columns if r.column_name == "id" and r.column_default is None}
+        for table in ("users", "applications", "swiped_left", "chat_messages",
+                      "interview_feedback", "notifications"):
+            if table in no_id_default:
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT gen_random_uuid()::text"))
+                logger.info("Added id default to %s", table)
+        # Single-column indexes made redundant by composites that lead with the same column
+        old_indexes = conn.scalars(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND indexname IN "
+            "('ix_applications_user_id', 'ix_swiped_left_user_id', "
+            "'ix_chat_messages_application_id', 'ix_notifications_user_id')"
+        )).all()
+        for name in old_indexes:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            logger.info("Dropped redundant index %s", name)
+        # create_all skips indexes on tables that already exist
+        for table in Base.metadata.sorted_tables:
+            for idx in table.indexes:
+                idx.create(conn, checkfirst=True)
 
 try:
     _safe_add_columns()
 except Exception as e:
     logger.warning("Column migration skipped: %s", e)
 
+def _bulk_insert(model, rows: List[dict]) -> int:
+    """Insert rows in one executemany batch, skipping ones whose primary key already exists."""
+    if not rows:
+        return 0
+    with engine.begin() as conn:
+        return conn.execute(pg_insert(model).on_conflict_do_nothing(), rows).rowcount
+
+
 # ── Seed HR Personalities (only once) ───────────────────────
 def seed_hr_personalities():
-    db = SessionLocal()
     try:
-        if db.query(HRPersonality).count() > 0:
-            return  # already seeded
+        with engine.connect() as conn:
+            if conn.scalar(select(HRPersonality.id).limit(1)) is not None:
+                return  # already seeded
         seeds = [
-            HRPersonality(
+            dict(
                 id="hr-google-01",
                 company="Google",
                 hr_name="Sarah Chen",
@@ -208,16 +313,16 @@ def seed_hr_personalities():
                     "questions using the STAR method. You value clarity, curiosity, and humility. "
                     "You like to put candidates at ease before diving into harder questions."
                 ),
-                common_questions=json.dumps([
+                common_questions=[
                     "Tell me about a time you solved a complex technical problem.",
                     "How do you approach system design for a new feature?",
                     "Describe a project where you had to collaborate across teams.",
                     "What does 'Googleyness' mean to you?",
                     "How do you handle ambiguity in requirements?",
-                ]),
+                ],
                 tone="professional",
             ),
-            HRPersonality(
+            dict(
                 id="hr-spotify-01",
                 company="Spotify",
                 hr_name="Erik Lindström",
@@ -228,16 +333,16 @@ def seed_hr_personalities():
                     "with casual conversation about interests before getting into technical depth. "
                     "You value diversity of thought and autonomous decision-making (Spotify's Band model)."
                 ),
-                common_questions=json.dumps([
+                common_questions=[
                     "What side projects are you most proud of?",
                     "How do you stay updated with new technologies?",
                     "Tell me about a time you made a decision with incomplete data.",
                     "How would you improve Spotify's recommendation algorithm?",
                     "Describe your ideal team culture.",
-                ]),
+                ],
                 tone="casual",
             ),
-            HRPersonality(
+            dict(
                 id="hr-stripe-01",
                 company="Stripe",
                 hr_name="Priya Mehta",
@@ -248,24 +353,19 @@ def seed_hr_personalities():
                     "about edge cases in distributed systems. You are warm but direct, and you "
                     "respect candidates who ask good clarifying questions."
                 ),
-                common_questions=json.dumps([
+                common_questions=[
                     "Walk me through how you'd design an idempotent payment API.",
                     "How do you approach testing in a distributed system?",
                     "Tell me about a production incident you handled.",
                     "What's your philosophy on code reviews?",
                     "How do you balance shipping fast with shipping reliably?",
-                ]),
+                ],
                 tone="professional",
             ),
         ]
-        db.add_all(seeds)
-        db.commit()
-        logger.info("Seeded %d HR personalities", len(seeds))
+        logger.info("Seeded %d HR personalities", _bulk_insert(HRPersonality, seeds))
     except Exception as e:
-        db.rollback()
         logger.warning("HR personality seed skipped: %s", e)
-    finally:
-        db.close()
 
 
 seed_hr_personalities()
@@ -275,15 +375,17 @@ def _reset_stuck_processing():
     """Reset applications stuck in 'processing' with no resume to 'saved'."""
     db = SessionLocal()
     try:
-        stuck = db.query(Application).filter(
-            Application.status == "processing",
-            ((Application.tailored_resume == "") | (Application.tailored_resume == None))
-        ).all()
-        for a in stuck:
-            a.status = "saved"
-        if stuck:
-            db.commit()
-            logger.info("Reset %d stuck processing apps to saved", len(stuck))
+        result = db.execute(
+            update(Application)
+            .where(
+                Application.status == "processing",
+                or_(Application.tailored_resume == "", Application.tailored_resume.is_(None)),
+            )
+            .values(status="saved")
+        )
+        db.commit()
+        if result.rowcount:
+            logger.info("Reset %d stuck processing apps to saved", result.rowcount)
     except Exception as e:
         db.rollback()
         logger.warning("Stuck processing reset skipped: %s", e)
@@ -307,58 +409,141 @@ def get_llm():
         if not api_key:
             logger.warning("GOOGLE_API_KEY not set – AI features disabled")
             return None
-        from langchain_google_genai import ChatGoogleGenerativeAI
-
         _llm = ChatGoogleGenerativeAI(
             model="gemini-3-pro-preview",
             google_api_key=api_key,
             max_retries=3,
+            timeout=120,
         )
     return _llm
 
 
-async def _invoke_with_retry(llm, prompt_or_messages, retries=3):
-    """Invoke the LLM with exponential backoff for 429 rate-limit errors."""
-    for attempt in range(retries):
-        try:
-            return await llm.ainvoke(prompt_or_messages)
-        except Exception as e:
-            err_str = str(e).lower()
-            if "429" in err_str or "resource exhausted" in err_str or "rate" in err_str:
-                wait = 2 ** attempt  # 1s, 2s, 4s
-                logger.warning("Rate limited (attempt %d/%d), waiting %ds…", attempt + 1, retries, wait)
-                await asyncio.sleep(wait)
-            else:
-                raise  # non-rate-limit error → bubble up
-    # Last attempt – let the exception propagate
-    return await llm.ainvoke(prompt_or_messages)
+# Output caps per caller. Gemini 3 counts thinking tokens against max_output_tokens,
+# so these leave headroom above the visible reply (~150 words chat, one-page resume).
+CHAT_MAX_TOKENS = 2048
+RESUME_MAX_TOKENS = 8192
+FEEDBACK_MAX_TOKENS = 2048
+INTERVIEW_MAX_TOKENS = 2048
+
+# Caps in-flight chat/resume/feedback calls per process so a burst of resume generations
+# can't eat the whole Gemini quota; the interview websocket calls the client directly.
+_llm_slots = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+
+
+# Rate-limit exception types across SDK generations (grpc, google-genai, langchain)
+_RATE_LIMIT_ERRORS = {"ResourceExhausted", "TooManyRequests", "GoogleRateLimitError", "ModelRateLimitError"}
+
+
+def _is_rate_limit(exc: BaseException) -> bool:
+    """True for a 429 / quota error, checked on the exception and the errors it wraps."""
+    while exc is not None:
+        if 429 in (getattr(exc, "code", None), getattr(exc, "status_code", None)):
+            return True
+        if any(cls.__name__ in _RATE_LIMIT_ERRORS for cls in type(exc).__mro__):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+async def _invoke_with_retry(llm, prompt_or_messages, retries=4, max_output_tokens=None):
+    """Invoke the LLM, retrying 429s with jittered exponential backoff (up to 30s).
+
+    Jitter keeps concurrent requests that hit the limit together from retrying in lockstep.
+    Other errors, and the last rate-limit error, propagate.
+    """
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(retries),
+        wait=wait_random_exponential(multiplier=1, max=30),
+        retry=retry_if_exception(_is_rate_limit),
+        before_sleep=lambda rs: logger.warning(
+            "Rate limited (attempt %d/%d), waiting %.1fs…",
+            rs.attempt_number, retries, rs.next_action.sleep,
+        ),
+        reraise=True,
+    ):
+        with attempt:
+            # Only hold a slot while the request is in flight, not during backoff
+            async with _llm_slots:
+                return await llm.ainvoke(prompt_or_messages, max_output_tokens=max_output_tokens)
+
+
+# Exact-match cache of accepted results for the deterministic-ish callers (resume,
+# feedback): a retry or double click with the same inputs shouldn't pay for another call.
+_llm_response_cache = TTLCache(maxsize=256, ttl=600)
+_TRAILING_WS = re.compile(r"[ \t]+$", re.MULTILINE)
+_EXTRA_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def _canonical_prompt(raw: str) -> str:
+    """Strip trailing spaces and collapse blank-line runs so equal prompts are byte-identical."""
+    return _EXTRA_BLANK_LINES.sub("\n\n", _TRAILING_WS.sub("", raw.replace("\r\n", "\n"))).strip()
+
+
+def _prompt_key(prompt_or_messages) -> str:
+    if isinstance(prompt_or_messages, str):
+        raw = prompt_or_messages
+    else:
+        raw = "\x00".join(f"{m.type}:{m.content}" for m in prompt_or_messages)
+    return hashlib.sha256(_canonical_prompt(raw).encode()).hexdigest()
+
+
+async def _invoke_cached(llm, prompt_or_messages, parse, max_output_tokens=None, refresh=False):
+    """Return parse(reply) for the prompt, reusing an accepted result from the last 10 minutes.
+
+    parse raises or returns a falsy value to reject a reply (empty, unparseable); rejected
+    replies are never cached, so a retry goes back to Gemini instead of replaying them.
+    refresh skips the lookup (an explicit regenerate) but still caches the new result.
+    """
+    key = _prompt_key(prompt_or_messages)
+    if not refresh and key in _llm_response_cache:
+        return _llm_response_cache[key]
+    response = await _invoke_with_retry(llm, prompt_or_messages, max_output_tokens=max_output_tokens)
+    # .text flattens Gemini 3's list-of-content-blocks replies into a plain string
+    result = parse(response.text)
+    if result:
+        _llm_response_cache[key] = result
+    return result
 
 
 # ── Jobs data ───────────────────────────────────────────────
 DATA_DIR = Path(__file__).resolve().parent / "data"
 
 
-def load_jobs():
+@functools.lru_cache(maxsize=1)
+def _load_jobs_cached(mtime: float):
+    """Parse jobs.json once per file version → (jobs list, job_id → job dict)."""
+    jobs = json.loads((DATA_DIR / "jobs.json").read_text())
+    for j in jobs:
+        j.setdefault("source", "external")
+    return jobs, {j["id"]: j for j in jobs}
+
+
+def _static_jobs():
     jobs_file = DATA_DIR / "jobs.json"
     if jobs_file.exists():
-        return json.loads(jobs_file.read_text())
-    return []
-
-
-def _job_lookup(db: Session):
-    """Build a dict of job_id → metadata from static + HR jobs."""
-    all_jobs = {j["id"]: j for j in load_jobs()}
-    for h in db.query(HRJob).all():
-        all_jobs[h.id] = {
-            "company": h.company, "logo": h.logo, "location": h.location,
-            "salary": h.salary, "type": h.type,
-            "tags": json.loads(h.tags) if h.tags else [],
-            "source": "kanso",
-        }
-    for jid, jdata in all_jobs.items():
-        if "source" not in jdata:
-            jdata["source"] = "external"
-    return all_jobs
+        return _load_jobs_cached(jobs_file.stat().st_mtime)
+    return [], {}
+
+
+def load_jobs():
+    """Static jobs (cached, shared — don't mutate)."""
+    return _static_jobs()[0]
+
+
+def load_jobs_by_id():
+    return _static_jobs()[1]
+
+
+def _job_meta(job_id: str, hr_job: Optional[HRJob] = None) -> dict:
+    """Metadata for a job: the HR-posted row if given, else the static job (or {})."""
+    if hr_job is None:
+        return load_jobs_by_id().get(job_id, {})
+    return {
+        "company": hr_job.company, "logo": hr_job.logo, "location": hr_job.location,
+        "salary": hr_job.salary, "type": hr_job.type,
+        "tags": hr_job.tags or [],
+        "source": "kanso",
+    }
 
 
 # ── App ─────────────────────────────────────────────────────
@@ -381,25 +566,35 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # ── Schemas ─────────────────────────────────────────────────
-class SwipeRequest(BaseModel):
+class RequestModel(BaseModel):
+    """Base for request bodies: read-only once validated, surrounding whitespace trimmed."""
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+
+
+class SwipeRequest(RequestModel):
     user_id: str
     job_id: str
     job_title: str
     description: str
 
 
-class RegisterRequest(BaseModel):
+class RegisterRequest(RequestModel):
     name: str
     email: str
     role: str = "user"  # user | hr
 
 
-class LoginRequest(BaseModel):
+class LoginRequest(RequestModel):
     email: str
 
 
-class PostJobRequest(BaseModel):
+class PostJobRequest(RequestModel):
     user_id: str
     company: str
     logo: Optional[str] = ""
@@ -412,7 +607,7 @@ class PostJobRequest(BaseModel):
     tags: Optional[List[str]] = []
 
 
-class ProfileUpdateRequest(BaseModel):
+class ProfileUpdateRequest(RequestModel):
     headline: Optional[str] = ""
     bio: Optional[str] = ""
     phone: Optional[str] = ""
@@ -431,20 +626,101 @@ class ProfileUpdateRequest(BaseModel):
     company_desc: Optional[str] = ""
 
 
-class ChatRequest(BaseModel):
+class ChatRequest(RequestModel):
     application_id: str
     user_id: str
     message: str
 
 
+# Response models for the hot list endpoints: with a response_model FastAPI
+# serializes straight to JSON bytes via pydantic-core instead of jsonable_encoder.
+class JobItem(BaseModel):
+    id: str
+    company: Optional[str] = ""
+    logo: Optional[str] = ""
+    title: Optional[str] = ""
+    location: Optional[str] = ""
+    type: Optional[str] = ""
+    salary: Optional[str] = ""
+    summary: Optional[str] = ""
+    description: Optional[str] = ""
+    tags: List[str] = []
+    source: str = "external"
+    posted_by: Optional[str] = None  # HR-posted jobs only
+
+
+class DashboardItem(BaseModel):
+    id: str
+    job_id: Optional[str] = None
+    job_title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    company: Optional[str] = ""
+    logo: Optional[str] = ""
+    location: Optional[str] = ""
+    salary: Optional[str] = ""
+    type: Optional[str] = ""
+    tags: List[str] = []
+    source: str = "external"
+
+
+class ChatMessageItem(BaseModel):
+    id: str
+    role: Optional[str] = None
+    content: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class HRApplicationItem(BaseModel):
+    id: str
+    job_title: Optional[str] = None
+    job_id: Optional[str] = None
+    applicant_name: Optional[str] = None
+    applicant_email: Optional[str] = ""
+    applicant_headline: str = ""
+    applicant_skills: List[str] = []
+    has_resume: bool = False
+    resume_app_id: Optional[str] = None
+    applied_at: Optional[datetime] = None
+    company: str = ""
+
+
+class HRJobItem(BaseModel):
+    id: str
+    company: Optional[str] = ""
+    logo: Optional[str] = ""
+    title: Optional[str] = ""
+    location: Optional[str] = ""
+    type: Optional[str] = ""
+    salary: Optional[str] = ""
+    summary: Optional[str] = ""
+    description: Optional[str] = ""
+    tags: List[str] = []
+    created_at: Optional[datetime] = None
+
+
+class FeedbackItem(BaseModel):
+    id: str
+    score: Optional[str] = None
+    summary: Optional[str] = None
+    strengths: List[str] = []
+    improvements: List[str] = []
+    transcript: Optional[str] = None
+    duration_seconds: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
 # ── Auth Routes ─────────────────────────────────────────────
 @app.post("/auth/register")
 def register(req: RegisterRequest, db: Session = Depends(get_db)):
     """Register with name + email. Role is user or hr."""
-    existing = db.query(User).filter(User.email == req.email).first()
+    existing = db.execute(
+        select(User.id, User.name, User.email, User.role).where(User.email == req.email)
+    ).first()
     if existing:
-        return {"id": existing.id, "name": existing.name, "email": existing.email, "role": existing.role}
-    user = User(id=str(uuid.uuid4()), name=req.name, email=req.email, role=req.role)
+        return existing._asdict()
+    user = User(name=req.name, email=req.email, role=req.role)
     db.add(user)
     db.commit()
     return {"id": user.id, "name": user.name, "email": user.email, "role": user.role}
@@ -453,36 +729,44 @@ def register(req: RegisterRequest, db: Session = Depends(get_db)):
 @app.post("/auth/login")
 def login(req: LoginRequest, db: Session = Depends(get_db)):
     """Login by email. Returns user data or 404."""
-    user = db.query(User).filter(User.email == req.email).first()
+    user = db.execute(
+        select(User.id, User.name, User.email, User.role).where(User.email == req.email)
+    ).first()
     if not user:
         raise HTTPException(status_code=404, detail="No account with that email. Please register first.")
-    return {"id": user.id, "name": user.name, "email": user.email, "role": user.role}
+    return user._asdict()
 
 
 # ── Profile Routes ──────────────────────────────────────────
+_PROFILE_TEXT_FIELDS = (
+    "headline", "bio", "phone", "location", "linkedin", "github", "portfolio",
+    "experience", "education", "resume_text", "profile_image",
+    "company_name", "company_role", "company_desc",
+)
+
+
+_JSON_SCALARS = (str, int, float)
+
+
+def _str_list(items: list) -> List[str]:
+    """Scalar items of a model-written or JSONB list as strings; nested objects are dropped."""
+    return [str(x) for x in items if isinstance(x, _JSON_SCALARS)]
+
+
+def _profile_dict(user: User) -> dict:
+    """Profile as the API returns it; skills is JSONB, coerced in case a row holds a scalar."""
+    profile = {"id": user.id, "name": user.name, "email": user.email, "role": user.role}
+    profile.update({f: getattr(user, f) or "" for f in _PROFILE_TEXT_FIELDS})
+    profile["skills"] = _str_list(user.skills) if isinstance(user.skills, list) else []
+    return profile
+
+
 @app.get("/profile/{user_id}")
 def get_profile(user_id: str, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return {
-        "id": user.id, "name": user.name, "email": user.email, "role": user.role,
-        "headline": user.headline or "",
-        "bio": user.bio or "",
-        "phone": user.phone or "",
-        "location": user.location or "",
-        "linkedin": user.linkedin or "",
-        "github": user.github or "",
-        "portfolio": user.portfolio or "",
-        "skills": json.loads(user.skills) if user.skills else [],
-        "experience": user.experience or "",
-        "education": user.education or "",
-        "resume_text": user.resume_text or "",
-        "profile_image": user.profile_image or "",
-        "company_name": user.company_name or "",
-        "company_role": user.company_role or "",
-        "company_desc": user.company_desc or "",
-    }
+    return _profile_dict(user)
 
 
 @app.put("/profile/{user_id}")
@@ -497,7 +781,7 @@ def update_profile(user_id: str, req: ProfileUpdateRequest, db: Session = Depend
     user.linkedin = req.linkedin or ""
     user.github = req.github or ""
     user.portfolio = req.portfolio or ""
-    user.skills = json.dumps(req.skills or [])
+    user.skills = [s for s in (req.skills or []) if s]  # drop whitespace-only entries
     user.experience = req.experience or ""
     user.education = req.education or ""
     user.resume_text = req.resume_text or ""
@@ -510,29 +794,35 @@ def update_profile(user_id: str, req: ProfileUpdateRequest, db: Session = Depend
 
 
 # ── Pure-Python resume parser (no AI calls) ────────────────
+_SECTION_PATTERNS = [
+    (sec, re.compile(pat)) for sec, pat in {
+        "summary": r"(?i)^(summary|about|profile|objective|professional\s*summary)",
+        "experience": r"(?i)^(experience|work\s*history|employment|professional\s*experience)",
+        "education": r"(?i)^(education|academic|degrees|certifications?|qualifications?)",
+        "skills": r"(?i)^(skills|technologies|technical\s*skills|competencies|expertise|tools)",
+    }.items()
+]
+_SKILLS_SPLIT = re.compile(r"[,•·|;\n]+")
+
+
 def _parse_resume_text(raw: str) -> dict:
     """Parse resume/CV text into structured fields using regex heuristics."""
     result = {"headline": "", "bio": "", "skills": [], "experience": "", "education": ""}
-    lines = raw.strip().split("\n")
+    lines = raw.strip().splitlines()
     non_empty = [l.strip() for l in lines if l.strip()]
     if len(non_empty) >= 2:
         result["headline"] = non_empty[1]  # first line = name, second = title
 
-    section_patterns = {
-        "summary": r"(?i)^(summary|about|profile|objective|professional\s*summary)",
-        "experience": r"(?i)^(experience|work\s*history|employment|professional\s*experience)",
-        "education": r"(?i)^(education|academic|degrees|certifications?|qualifications?)",
-        "skills": r"(?i)^(skills|technologies|technical\s*skills|competencies|expertise|tools)",
-    }
     sections: dict[str, list[str]] = {"header": []}
     current = "header"
     for line in lines:
         s = line.strip()
         matched = None
-        for sec, pat in section_patterns.items():
-            if re.match(pat, s) and len(s) < 60:
-                matched = sec
-                break
+        if len(s) < 60:
+            for sec, rx in _SECTION_PATTERNS:
+                if rx.match(s):
+                    matched = sec
+                    break
         if matched:
             current = matched
             sections.setdefault(current, [])
@@ -549,26 +839,42 @@ def _parse_resume_text(raw: str) -> dict:
     if "education" in sections and sections["education"]:
         result["education"] = sections["education"]
     if "skills" in sections and sections["skills"]:
-        raw_skills = re.split(r"[,•·|;\n]+", sections["skills"])
+        raw_skills = _SKILLS_SPLIT.split(sections["skills"])
         result["skills"] = [s.strip() for s in raw_skills if s.strip() and len(s.strip()) < 50]
     return result
 
 
+MAX_PDF_BYTES = 20 * 1024 * 1024
+
+
+def _extract_pdf_text(fp) -> str:
+    """Extract text from a binary PDF file object with PyMuPDF; fall back to pdfplumber if it finds nothing."""
+    import pymupdf
+    fp.seek(0)
+    with pymupdf.open(stream=fp.read(), filetype="pdf") as doc:
+        extracted = "\n".join(page.get_text("text") for page in doc)
+    if extracted.strip():
+        return extracted
+
+    import pdfplumber
+    fp.seek(0)
+    with pdfplumber.open(fp) as pdf:
+        return "\n".join(text for page in pdf.pages if (text := page.extract_text()))
+
+
 @app.post("/parse-linkedin")
 async def parse_linkedin(file: UploadFile = File(...)):
-    """Parse uploaded LinkedIn PDF CV using pdfplumber (pure Python, no AI calls)."""
+    """Parse uploaded LinkedIn PDF CV with PyMuPDF (no AI calls)."""
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Please upload a PDF file.")
 
-    import pdfplumber, io
-    pdf_bytes = await file.read()
-    extracted = ""
+    # The upload is already spooled to a temp file (on disk past 1 MB): check its size
+    # and let the worker thread read it, rather than pulling it into memory here.
+    if (file.size or 0) > MAX_PDF_BYTES:
+        raise HTTPException(status_code=413, detail="PDF is too large (max 20 MB).")
     try:
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    extracted += text + "\n"
+        # C-backed but still CPU-bound — keep it off the event loop
+        extracted = await asyncio.to_thread(_extract_pdf_text, file.file)
     except Exception as e:
         logger.error("PDF extraction error: %s", e)
         raise HTTPException(status_code=400, detail="Could not read the PDF. Make sure it's a valid PDF file.")
@@ -585,13 +891,10 @@ def read_root():
     return {"status": "KansoAI Engine Running"}
 
 
-@app.get("/jobs/{user_id}")
+@app.get("/jobs/{user_id}", response_model=List[JobItem], response_model_exclude_unset=True)
 def get_jobs(user_id: str, db: Session = Depends(get_db)):
     """Return jobs the user hasn't swiped on yet. Merges static + HR-posted."""
     static_jobs = load_jobs()
-    for j in static_jobs:
-        if "source" not in j:
-            j["source"] = "external"
 
     hr_jobs_db = db.query(HRJob).all()
     hr_jobs = [
@@ -605,7 +908,7 @@ def get_jobs(user_id: str, db: Session = Depends(get_db)):
             "salary": h.salary,
             "summary": h.summary,
             "description": h.description,
-            "tags": json.loads(h.tags) if h.tags else [],
+            "tags": h.tags or [],
             "source": "kanso",
             "posted_by": h.posted_by,
         }
@@ -614,13 +917,10 @@ def get_jobs(user_id: str, db: Session = Depends(get_db)):
 
     all_jobs = static_jobs + hr_jobs
 
-    swiped_right_ids = {
-        a.job_id for a in db.query(Application).filter(Application.user_id == user_id).all()
-    }
-    swiped_left_ids = {
-        s.job_id for s in db.query(SwipedLeft).filter(SwipedLeft.user_id == user_id).all()
-    }
-    seen = swiped_right_ids | swiped_left_ids
+    seen = set(db.scalars(union(
+        select(Application.job_id).where(Application.user_id == user_id),
+        select(SwipedLeft.job_id).where(SwipedLeft.user_id == user_id),
+    )))
 
     return [j for j in all_jobs if j["id"] not in seen]
 
@@ -628,18 +928,17 @@ def get_jobs(user_id: str, db: Session = Depends(get_db)):
 @app.post("/swipe-right")
 async def handle_swipe_right(
     swipe: SwipeRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """User liked a job → save it. Resume generation is triggered separately."""
     application = Application(
-        id=str(uuid.uuid4()),
         user_id=swipe.user_id,
         job_id=swipe.job_id,
         job_title=swipe.job_title,
         description=swipe.description,
     )
     db.add(application)
-    db.commit()
+    await db.commit()
     return {"message": "Job saved!", "job": swipe.job_title}
 
 
@@ -648,10 +947,10 @@ async def generate_resume(
     app_id: str,
     background_tasks: BackgroundTasks,
     user_id: str = Query(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """User-triggered resume generation."""
-    application = db.query(Application).filter(Application.id == app_id).first()
+    application = await db.get(Application, app_id)
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     if application.status == "processing" and application.tailored_resume:
@@ -662,71 +961,74 @@ async def generate_resume(
         raise HTTPException(status_code=503, detail="AI not available – API key not configured.")
 
     application.status = "processing"
-    db.commit()
+    await db.commit()
 
-    user = db.query(User).filter(User.id == user_id).first()
-    user_data = {}
-    if user:
-        user_data = {
-            "name": user.name or "",
-            "email": user.email or "",
-            "phone": user.phone or "",
-            "location": user.location or "",
-            "linkedin": user.linkedin or "",
-            "github": user.github or "",
-            "headline": user.headline or "",
-            "skills": json.loads(user.skills) if user.skills else [],
-            "experience": user.experience or "",
-            "education": user.education or "",
-            "resume_text": user.resume_text or "",
-        }
+    user = await db.get(User, user_id)
+    user_data = _profile_dict(user) if user else {}
 
+    # An existing resume means "Regenerate": don't hand back the cached one
     background_tasks.add_task(
-        tailor_resume, app_id, application.job_title, application.description, user_data
+        tailor_resume, app_id, application.job_title, application.description, user_data,
+        bool(application.tailored_resume),
     )
     return {"message": "Resume generation started."}
 
 
 @app.post("/swipe-left")
-async def handle_swipe_left(swipe: SwipeRequest, db: Session = Depends(get_db)):
-    entry = SwipedLeft(id=str(uuid.uuid4()), user_id=swipe.user_id, job_id=swipe.job_id)
+async def handle_swipe_left(swipe: SwipeRequest, db: AsyncSession = Depends(get_async_db)):
+    entry = SwipedLeft(user_id=swipe.user_id, job_id=swipe.job_id)
     db.add(entry)
-    db.commit()
+    await db.commit()
     return {"message": "Job dismissed."}
 
 
-@app.get("/dashboard/{user_id}")
+@app.get("/dashboard/{user_id}", response_model=List[DashboardItem])
 def get_dashboard(user_id: str, db: Session = Depends(get_db)):
-    all_jobs = _job_lookup(db)
-    apps = db.query(Application).filter(Application.user_id == user_id).order_by(Application.created_at.desc()).all()
-    return [
-        {
+    # List view: skip the (large) tailored_resume — /application/{id} returns it
+    rows = db.execute(
+        select(Application, HRJob)
+        .outerjoin(HRJob, HRJob.id == Application.job_id)
+        .where(Application.user_id == user_id)
+        .order_by(Application.created_at.desc())
+        .options(
+            load_only(Application.id, Application.job_id, Application.job_title,
+                      Application.description, Application.status, Application.created_at),
+            load_only(HRJob.company, HRJob.logo, HRJob.location, HRJob.salary,
+                      HRJob.type, HRJob.tags),
+        )
+    ).all()
+    result = []
+    for a, hr_job in rows:
+        job_data = _job_meta(a.job_id, hr_job)
+        result.append({
             "id": a.id,
             "job_id": a.job_id,
             "job_title": a.job_title,
             "description": a.description,
             "status": a.status,
-            "tailored_resume": a.tailored_resume,
-            "created_at": str(a.created_at) if a.created_at else None,
-            "company": all_jobs.get(a.job_id, {}).get("company", ""),
-            "logo": all_jobs.get(a.job_id, {}).get("logo", ""),
-            "location": all_jobs.get(a.job_id, {}).get("location", ""),
-            "salary": all_jobs.get(a.job_id, {}).get("salary", ""),
-            "type": all_jobs.get(a.job_id, {}).get("type", ""),
-            "tags": all_jobs.get(a.job_id, {}).get("tags", []),
-            "source": all_jobs.get(a.job_id, {}).get("source", "external"),
-        }
-        for a in apps
-    ]
+            "created_at": a.created_at,
+            "company": job_data.get("company", ""),
+            "logo": job_data.get("logo", ""),
+            "location": job_data.get("location", ""),
+            "salary": job_data.get("salary", ""),
+            "type": job_data.get("type", ""),
+            "tags": job_data.get("tags", []),
+            "source": job_data.get("source", "external"),
+        })
+    return result
 
 
 @app.get("/application/{app_id}")
 def get_application(app_id: str, db: Session = Depends(get_db)):
-    all_jobs = _job_lookup(db)
-    application = db.query(Application).filter(Application.id == app_id).first()
-    if not application:
+    row = db.execute(
+        select(Application, HRJob)
+        .outerjoin(HRJob, HRJob.id == Application.job_id)
+        .where(Application.id == app_id)
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Application not found")
-    job_data = all_jobs.get(application.job_id, {})
+    application, hr_job = row
+    job_data = _job_meta(application.job_id, hr_job)
     return {
         "id": application.id,
         "job_id": application.job_id,
@@ -768,55 +1070,71 @@ def update_application_status(app_id: str, status: str = Query(...), db: Session
 
 
 # ── AI-HR Chat ──────────────────────────────────────────────
-@app.get("/hr-personalities/{company}")
-def get_hr_personality(company: str, db: Session = Depends(get_db)):
-    """Get HR personality for a company (case-insensitive partial match)."""
+# Personalities are seeded and rarely change; clear this if an endpoint ever writes them.
+_hr_personality_cache = TTLCache(maxsize=256, ttl=300)
+
+
+@cached(_hr_personality_cache, key=lambda company_lc, db: company_lc, lock=threading.Lock())
+def _lookup_hr_personality(company_lc: str, db: Session) -> Optional[dict]:
     p = db.query(HRPersonality).filter(
-        HRPersonality.company.ilike(f"%{company}%")
+        HRPersonality.company.ilike(f"%{company_lc}%")
     ).first()
     if not p:
         return None
     return {
         "id": p.id, "company": p.company, "hr_name": p.hr_name,
         "tone": p.tone,
-        "common_questions": json.loads(p.common_questions) if p.common_questions else [],
+        "common_questions": p.common_questions or [],
     }
 
 
-@app.get("/chat/{application_id}")
+@app.get("/hr-personalities/{company}")
+def get_hr_personality(company: str, db: Session = Depends(get_db)):
+    """Get HR personality for a company (case-insensitive partial match)."""
+    return _lookup_hr_personality(company.lower().strip(), db)
+
+
+@app.get("/chat/{application_id}", response_model=List[ChatMessageItem])
 def get_chat_history(application_id: str, db: Session = Depends(get_db)):
     """Return chat messages for an application, ordered chronologically."""
-    msgs = db.query(ChatMessage).filter(
-        ChatMessage.application_id == application_id
-    ).order_by(ChatMessage.created_at.asc()).all()
+    msgs = db.execute(
+        select(ChatMessage.id, ChatMessage.role, ChatMessage.content, ChatMessage.created_at)
+        .where(ChatMessage.application_id == application_id)
+        .order_by(ChatMessage.created_at.asc())
+    ).all()
     return [
-        {"id": m.id, "role": m.role, "content": m.content,
-         "created_at": str(m.created_at) if m.created_at else None}
+        {"id": m.id, "role": m.role, "content": m.content, "created_at": m.created_at}
         for m in msgs
     ]
 
 
 @app.post("/chat")
-async def chat_with_hr(req: ChatRequest, db: Session = Depends(get_db)):
+async def chat_with_hr(req: ChatRequest, db: AsyncSession = Depends(get_async_db)):
     """Send a message to AI-HR and get a response. Uses HR personality if available."""
     llm = get_llm()
     if not llm:
         raise HTTPException(status_code=503, detail="AI not available – API key not configured.")
 
-    # Get the application context
-    application = db.query(Application).filter(Application.id == req.application_id).first()
+    # Get the application context and, for HR-posted jobs, the company in one query
+    application = (await db.execute(
+        select(Application.job_id, Application.job_title, Application.description,
+               HRJob.id.label("hr_job_id"), HRJob.company)
+        .outerjoin(HRJob, HRJob.id == Application.job_id)
+        .where(Application.id == req.application_id)
+    )).first()
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
 
-    # Look up company from job data
-    all_jobs = _job_lookup(db)
-    job_data = all_jobs.get(application.job_id, {})
-    company = job_data.get("company", "")
+    # HR-posted jobs override static ones
+    if application.hr_job_id is not None:
+        company = application.company
+    else:
+        company = _job_meta(application.job_id).get("company", "")
 
     # Try to find an HR personality for this company
-    personality = db.query(HRPersonality).filter(
-        HRPersonality.company.ilike(f"%{company}%")
-    ).first() if company else None
+    personality = await db.scalar(
+        select(HRPersonality).where(HRPersonality.company.ilike(f"%{company}%")).limit(1)
+    ) if company else None
 
     # Build system prompt
     if personality:
@@ -836,14 +1154,18 @@ async def chat_with_hr(req: ChatRequest, db: Session = Depends(get_db)):
             f"Answer questions about the role, share interview tips, and ask follow-up questions."
         )
 
-    # Load recent chat history (last 10 messages to keep context small)
-    history = db.query(ChatMessage).filter(
-        ChatMessage.application_id == req.application_id
-    ).order_by(ChatMessage.created_at.desc()).limit(10).all()
-    history.reverse()
+    # Load recent chat history (last 10 messages to keep context small), oldest first
+    recent = (
+        select(ChatMessage.role, ChatMessage.content, ChatMessage.created_at)
+        .where(ChatMessage.application_id == req.application_id)
+        .order_by(ChatMessage.created_at.desc()).limit(10)
+        .subquery()
+    )
+    history = (await db.execute(
+        select(recent.c.role, recent.c.content).order_by(recent.c.created_at)
+    )).all()
 
     # Build message list for LLM
-    from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
     messages = [SystemMessage(content=system)]
     for m in history:
         if m.role == "user":
@@ -852,33 +1174,26 @@ async def chat_with_hr(req: ChatRequest, db: Session = Depends(get_db)):
             messages.append(AIMessage(content=m.content))
     messages.append(HumanMessage(content=req.message))
 
-    # Save user message
-    user_msg = ChatMessage(
-        id=str(uuid.uuid4()),
-        application_id=req.application_id,
-        role="user",
-        content=req.message,
-    )
-    db.add(user_msg)
-    db.commit()
+    # End the read transaction so no pooled connection is held while Gemini answers
+    await db.commit()
 
     # Call Gemini (with retry for rate limits)
     try:
-        response = await _invoke_with_retry(llm, messages)
-        reply = response.content
+        response = await _invoke_with_retry(llm, messages, max_output_tokens=CHAT_MAX_TOKENS)
+        reply = response.text
     except Exception as e:
         logger.error("Gemini chat error: %s", e)
         reply = "I'm having trouble connecting right now. Please try again in a moment."
 
-    # Save assistant message
-    ai_msg = ChatMessage(
-        id=str(uuid.uuid4()),
-        application_id=req.application_id,
-        role="assistant",
-        content=reply,
-    )
-    db.add(ai_msg)
-    db.commit()
+    # Save both turns in one INSERT. now() is the transaction start and clock_timestamp()
+    # is taken later, so the user message still sorts before the reply.
+    await db.execute(insert(ChatMessage).values([
+        {"application_id": req.application_id, "role": "user",
+         "content": req.message, "created_at": func.now()},
+        {"application_id": req.application_id, "role": "assistant",
+         "content": reply, "created_at": func.clock_timestamp()},
+    ]))
+    await db.commit()
 
     return {
         "reply": reply,
@@ -931,37 +1246,92 @@ LATEX_TEMPLATE = r"""
 %% CONTENT_PLACEHOLDER
 \end{document}
 """
+_LATEX_PREFIX, _LATEX_SUFFIX = LATEX_TEMPLATE.split("%% CONTENT_PLACEHOLDER", 1)
+
+_LATEX_ESCAPE = str.maketrans({
+    "\\": r"\textbackslash{}", "&": r"\&", "%": r"\%", "#": r"\#", "$": r"\$", "_": r"\_",
+    "{": r"\{", "}": r"\}", "~": r"\textasciitilde{}", "^": r"\textasciicircum{}",
+})
 
 
-async def tailor_resume(app_id: str, job_title: str, description: str, user_data: dict = None):
+def _latex_escape(value: str) -> str:
+    return (value or "").translate(_LATEX_ESCAPE)
+
+
+# \href URL arguments keep _ % # ~ raw, but a backslash or brace could still smuggle in a
+# command like \input{.env}; valid emails and profile URLs never contain them.
+_HREF_UNSAFE = str.maketrans("", "", "\\{}")
+
+
+def _href_safe(value: str) -> str:
+    return (value or "").translate(_HREF_UNSAFE)
+
+
+# Leading ``` / ```lang line and trailing ``` around a model reply
+_FENCE_RE = re.compile(r"\A```[\w+-]*[ \t]*\n?|\n?```\s*\Z")
+
+
+def _strip_fences(text: str) -> str:
+    return _FENCE_RE.sub("", text.strip()).strip()
+
+
+# Static part of the resume prompt. It goes first so the provider can reuse the cached
+# prefix across candidates; everything per-request is appended after it.
+_RESUME_INSTRUCTIONS = (
+    "You are an expert resume writer. You MUST output ONLY the LaTeX body content "
+    "(everything between \\begin{document} and \\end{document}) for a professional "
+    "resume using the Jake Ryan LaTeX template commands provided below.\n\n"
+    "AVAILABLE COMMANDS:\n"
+    "- \\resumeSubheading{Title}{Dates}{Subtitle}{Location}\n"
+    "- \\resumeItem{Description text}\n"
+    "- \\resumeProjectHeading{\\textbf{Name} $|$ \\emph{Tech stack}}{Dates}\n"
+    "- \\resumeSubHeadingListStart / \\resumeSubHeadingListEnd\n"
+    "- \\resumeItemListStart / \\resumeItemListEnd\n"
+    "- \\section{Section Name}\n\n"
+    "INSTRUCTIONS:\n"
+    "1. Start with a centered heading block: name, phone, email, linkedin, github.\n"
+    "2. Include sections: Education, Experience, Projects (if relevant), Technical Skills.\n"
+    "3. TAILOR bullet points to emphasize skills/experience relevant to the target job below.\n"
+    "4. Use strong action verbs and quantify achievements where possible.\n"
+    "5. Keep it to ONE page of content.\n"
+    "6. Candidate text fields are already LaTeX-escaped; copy them as given. Escape &, %, #, $, _ "
+    "in any other text you write (URL arguments of \\href stay raw).\n"
+    "7. Return ONLY the LaTeX body content (no \\documentclass, no preamble, "
+    "no \\begin{document}/\\end{document}). Start directly with \\begin{center}.\n"
+    "8. Do NOT wrap in markdown code fences."
+)
+
+
+def _resume_body(reply: str) -> str:
+    """LaTeX body from a model reply: fences and any \\begin/\\end{document} removed."""
+    content = _strip_fences(reply)
+    return content.replace("\\begin{document}", "").replace("\\end{document}", "").strip()
+
+
+async def tailor_resume(
+    app_id: str, job_title: str, description: str, user_data: dict = None, regenerate: bool = False
+):
     """Call Gemini to produce a LaTeX resume using the Jake Ryan template."""
     llm = get_llm()
     if not llm:
         return
 
     ud = user_data or {}
-    name = ud.get("name", "Your Name")
-    email = ud.get("email", "")
-    phone = ud.get("phone", "")
-    location = ud.get("location", "")
-    linkedin = ud.get("linkedin", "")
-    github = ud.get("github", "")
-    skills = ud.get("skills", [])
-    experience = ud.get("experience", "")
-    education = ud.get("education", "")
-    resume_text = ud.get("resume_text", "")
+    # Free-text fields go into the document body, so escape them here rather than trusting
+    # the model to; email/linkedin/github end up as \href targets, so only strip \ { }.
+    name = _latex_escape(ud.get("name", "Your Name"))
+    email = _href_safe(ud.get("email", ""))
+    phone = _latex_escape(ud.get("phone", ""))
+    location = _latex_escape(ud.get("location", ""))
+    linkedin = _href_safe(ud.get("linkedin", ""))
+    github = _href_safe(ud.get("github", ""))
+    skills = [_latex_escape(s) for s in ud.get("skills", [])]
+    experience = _latex_escape(ud.get("experience", "")[:1200])
+    education = _latex_escape(ud.get("education", "")[:800])
+    resume_text = _latex_escape(ud.get("resume_text", "")[:1500])
 
     prompt = (
-        "You are an expert resume writer. You MUST output ONLY the LaTeX body content "
-        "(everything between \\begin{document} and \\end{document}) for a professional "
-        "resume using the Jake Ryan LaTeX template commands provided below.\n\n"
-        "AVAILABLE COMMANDS:\n"
-        "- \\resumeSubheading{Title}{Dates}{Subtitle}{Location}\n"
-        "- \\resumeItem{Description text}\n"
-        "- \\resumeProjectHeading{\\textbf{Name} $|$ \\emph{Tech stack}}{Dates}\n"
-        "- \\resumeSubHeadingListStart / \\resumeSubHeadingListEnd\n"
-        "- \\resumeItemListStart / \\resumeItemListEnd\n"
-        "- \\section{Section Name}\n\n"
+        f"{_RESUME_INSTRUCTIONS}\n\n"
         f"CANDIDATE INFO:\n"
         f"- Name: {name}\n"
         f"- Email: {email}\n"
@@ -970,38 +1340,22 @@ async def tailor_resume(app_id: str, job_title: str, description: str, user_data
         f"- LinkedIn: {linkedin}\n"
         f"- GitHub: {github}\n"
         f"- Skills: {', '.join(skills) if skills else 'Not specified'}\n"
-        f"- Education: {education[:800] if education else 'Not specified'}\n"
-        f"- Experience: {experience[:1200] if experience else 'Not specified'}\n"
+        f"- Education: {education or 'Not specified'}\n"
+        f"- Experience: {experience or 'Not specified'}\n"
     )
     if resume_text:
-        prompt += f"- Existing Resume Text: {resume_text[:1500]}\n"
+        prompt += f"- Existing Resume Text: {resume_text}\n"
 
     prompt += (
         f"\nTARGET JOB: {job_title}\n"
-        f"JOB DESCRIPTION:\n{description[:2000]}\n\n"
-        "INSTRUCTIONS:\n"
-        "1. Start with a centered heading block: name, phone, email, linkedin, github.\n"
-        "2. Include sections: Education, Experience, Projects (if relevant), Technical Skills.\n"
-        "3. TAILOR bullet points to emphasize skills/experience relevant to the job.\n"
-        "4. Use strong action verbs and quantify achievements where possible.\n"
-        "5. Keep it to ONE page of content.\n"
-        "6. Escape special LaTeX characters: & → \\&, % → \\%, # → \\#, $ (in text) → \\$.\n"
-        "7. Return ONLY the LaTeX body content (no \\documentclass, no preamble, "
-        "no \\begin{document}/\\end{document}). Start directly with \\begin{center}.\n"
-        "8. Do NOT wrap in markdown code fences."
+        f"JOB DESCRIPTION:\n{description[:2000]}\n"
     )
+    prompt = _canonical_prompt(prompt)
 
     try:
-        response = await _invoke_with_retry(llm, prompt)
-        content = response.content.strip()
-        # Strip markdown fences if present
-        if content.startswith("```"):
-            content = content.split("\n", 1)[1] if "\n" in content else content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-        # Strip any \begin{document}/\end{document} if Gemini added them
-        content = content.replace("\\begin{document}", "").replace("\\end{document}", "").strip()
+        content = await _invoke_cached(
+            llm, prompt, _resume_body, max_output_tokens=RESUME_MAX_TOKENS, refresh=regenerate
+        )
     except Exception as e:
         logger.error("Resume tailor error: %s", e)
         content = ""
@@ -1010,17 +1364,14 @@ async def tailor_resume(app_id: str, job_title: str, description: str, user_data
         return
 
     # Assemble full LaTeX document
-    full_latex = LATEX_TEMPLATE.replace("%% CONTENT_PLACEHOLDER", content)
+    full_latex = f"{_LATEX_PREFIX}{content}{_LATEX_SUFFIX}"
 
-    db = SessionLocal()
-    try:
-        application = db.query(Application).filter(Application.id == app_id).first()
+    async with AsyncSessionLocal() as db:
+        application = await db.get(Application, app_id)
         if application:
             application.tailored_resume = full_latex
             application.status = "ready"
-            db.commit()
-    finally:
-        db.close()
+            await db.commit()
 
 
 # ── Notes ───────────────────────────────────────────────────
@@ -1036,110 +1387,181 @@ def update_notes(app_id: str, body: dict, db: Session = Depends(get_db)):
 
 # ── Apply ───────────────────────────────────────────────────
 @app.post("/application/{app_id}/apply")
-def mark_applied(app_id: str, db: Session = Depends(get_db)):
+async def mark_applied(app_id: str, db: AsyncSession = Depends(get_async_db)):
     """Apply to a job. For Kanso (internal) jobs, notifies the HR who posted it."""
-    application = db.query(Application).filter(Application.id == app_id).first()
-    if not application:
+    applied = (await db.execute(
+        update(Application).where(Application.id == app_id).values(status="applied")
+        .returning(Application.job_id, Application.user_id, Application.job_title)
+    )).first()
+    if not applied:
         raise HTTPException(status_code=404, detail="Application not found")
-    application.status = "applied"
 
     # Check if this is a Kanso (internal) job → notify the HR
-    hr_job = db.query(HRJob).filter(HRJob.id == application.job_id).first()
+    hr_job = (await db.execute(
+        select(HRJob.posted_by, HRJob.company, User.name.label("applicant_name"))
+        .outerjoin(User, User.id == applied.user_id)
+        .where(HRJob.id == applied.job_id)
+    )).first()
     is_internal = hr_job is not None
     if hr_job:
-        applicant = db.query(User).filter(User.id == application.user_id).first()
-        applicant_name = applicant.name if applicant else "Someone"
-        notif = Notification(
-            id=str(uuid.uuid4()),
+        applicant_name = hr_job.applicant_name or "Someone"
+        await db.execute(insert(Notification).values(
             user_id=hr_job.posted_by,
             title=f"New applicant: {applicant_name}",
-            body=f"{applicant_name} applied for your \"{application.job_title}\" role at {hr_job.company}. Check your Applications tab to review.",
+            body=f"{applicant_name} applied for your \"{applied.job_title}\" role at {hr_job.company}. Check your Applications tab to review.",
             link_page="hr",
             read="false",
-        )
-        db.add(notif)
-    db.commit()
+        ))
+    await db.commit()
     return {"message": "Application submitted! 🎉" if is_internal else "Application marked as applied! 🎉", "is_internal": is_internal}
 
 
 # ── Resume PDF ──────────────────────────────────────────────
-@app.get("/application/{app_id}/resume-pdf")
-def get_resume_pdf(app_id: str, db: Session = Depends(get_db)):
-    """Compile LaTeX resume to PDF and return it."""
-    application = db.query(Application).filter(Application.id == app_id).first()
-    if not application or not application.tailored_resume:
-        raise HTTPException(status_code=404, detail="No resume found")
+# Compiled PDFs keyed by the sha256 of their LaTeX, so re-opening a resume skips pdflatex
+PDF_CACHE_DIR = Path(os.getenv("PDF_CACHE_DIR", Path(tempfile.gettempdir()) / "kanso-pdf-cache"))
+PDF_CACHE_MAX_AGE = int(os.getenv("PDF_CACHE_MAX_AGE_DAYS", "7")) * 86400
 
-    latex = application.tailored_resume
-    if "\\documentclass" not in latex:
-        raise HTTPException(status_code=400, detail="Resume is not in LaTeX format")
 
-    with tempfile.TemporaryDirectory() as tmpdir:
+def _prune_pdf_cache():
+    """Delete cached PDFs not served for PDF_CACHE_MAX_AGE; regenerated resumes leave old ones."""
+    cutoff = time.time() - PDF_CACHE_MAX_AGE
+    for path in PDF_CACHE_DIR.glob("*.pdf"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            pass  # removed by a concurrent prune
+
+
+def _compile_latex(latex: str, pdf_path: Path) -> bool:
+    """Run pdflatex and move the result to pdf_path. Blocking; call it via a thread."""
+    PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    _prune_pdf_cache()
+    # Build inside the cache dir so the final os.replace is an atomic same-filesystem rename
+    with tempfile.TemporaryDirectory(dir=PDF_CACHE_DIR) as tmpdir:
         tex_path = os.path.join(tmpdir, "resume.tex")
         with open(tex_path, "w", encoding="utf-8") as f:
             f.write(latex)
 
-        # Run pdflatex twice (for references / table of contents)
-        for _ in range(2):
-            result = subprocess.run(
-                ["pdflatex", "-interaction=nonstopmode",
-                 "-output-directory", tmpdir, tex_path],
-                capture_output=True, timeout=60,
-            )
+        cmd = ["pdflatex", "-interaction=nonstopmode", "-output-directory", tmpdir, tex_path]
+        result = subprocess.run(cmd, capture_output=True, timeout=60)
+        # Second pass only when LaTeX reports unresolved references
+        if b"Rerun to get" in result.stdout:
+            result = subprocess.run(cmd, capture_output=True, timeout=60)
 
-        pdf_path = os.path.join(tmpdir, "resume.pdf")
-        if not os.path.exists(pdf_path):
-            # Return compilation log for debugging
+        out_path = os.path.join(tmpdir, "resume.pdf")
+        if not os.path.exists(out_path):
             log = result.stdout.decode(errors="replace")[-2000:]
             logger.error("pdflatex failed:\n%s", log)
-            raise HTTPException(status_code=500, detail="PDF compilation failed. LaTeX may have errors.")
+            return False
+        os.replace(out_path, pdf_path)
+    return True
+
+
+@app.get("/application/{app_id}/resume-pdf")
+async def get_resume_pdf(app_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Compile LaTeX resume to PDF and return it."""
+    latex = await db.scalar(select(Application.tailored_resume).where(Application.id == app_id))
+    # End the read transaction so no pooled connection is held while pdflatex runs
+    await db.commit()
+    if not latex:
+        raise HTTPException(status_code=404, detail="No resume found")
+    if "\\documentclass" not in latex:
+        raise HTTPException(status_code=400, detail="Resume is not in LaTeX format")
 
-        with open(pdf_path, "rb") as f:
-            pdf_bytes = f.read()
+    pdf_path = PDF_CACHE_DIR / f"{hashlib.sha256(latex.encode()).hexdigest()}.pdf"
+    try:
+        os.utime(pdf_path)  # cache hit: refresh mtime so the age-based prune keeps it
+    except FileNotFoundError:
+        if not await asyncio.to_thread(_compile_latex, latex, pdf_path):
+            raise HTTPException(status_code=500, detail="PDF compilation failed. LaTeX may have errors.")
 
-    return Response(
-        content=pdf_bytes,
+    return FileResponse(
+        pdf_path,
         media_type="application/pdf",
-        headers={"Content-Disposition": f'inline; filename="resume-{app_id[:8]}.pdf"'},
+        filename=f"resume-{app_id[:8]}.pdf",
+        content_disposition_type="inline",
     )
 
 
 # ── HR Applications ─────────────────────────────────────────
-@app.get("/hr/applications/{user_id}")
+@app.get("/hr/applications/{user_id}", response_model=List[HRApplicationItem])
 def hr_get_applications(user_id: str, db: Session = Depends(get_db)):
     """Get all applications submitted to jobs posted by this HR user."""
-    hr_jobs = db.query(HRJob).filter(HRJob.posted_by == user_id).all()
-    job_map = {j.id: j for j in hr_jobs}
-    if not job_map:
-        return []
-
-    apps = db.query(Application).filter(
-        Application.job_id.in_(job_map.keys()),
-        Application.status == "applied",
-    ).order_by(Application.created_at.desc()).all()
+    rows = db.execute(
+        select(
+            Application.id, Application.job_title, Application.job_id, Application.created_at,
+            (func.coalesce(Application.tailored_resume, "") != "").label("has_resume"),
+            HRJob.company,
+            User.id.label("applicant_id"), User.name, User.email, User.headline, User.skills,
+        )
+        .join(HRJob, HRJob.id == Application.job_id)
+        .outerjoin(User, User.id == Application.user_id)
+        .where(HRJob.posted_by == user_id, Application.status == "applied")
+        .order_by(Application.created_at.desc())
+    ).all()
 
     result = []
-    for a in apps:
-        job = job_map.get(a.job_id)
-        applicant = db.query(User).filter(User.id == a.user_id).first()
+    for r in rows:
+        found = r.applicant_id is not None
         result.append({
-            "id": a.id,
-            "job_title": a.job_title,
-            "job_id": a.job_id,
-            "applicant_name": applicant.name if applicant else "Unknown",
-            "applicant_email": applicant.email if applicant else "",
-            "applicant_headline": (applicant.headline or "") if applicant else "",
-            "applicant_skills": json.loads(applicant.skills) if applicant and applicant.skills else [],
-            "has_resume": bool(a.tailored_resume),
-            "resume_app_id": a.id if a.tailored_resume else None,
-            "applied_at": str(a.created_at) if a.created_at else None,
-            "company": job.company if job else "",
+            "id": r.id,
+            "job_title": r.job_title,
+            "job_id": r.job_id,
+            "applicant_name": r.name if found else "Unknown",
+            "applicant_email": r.email if found else "",
+            "applicant_headline": r.headline or "",
+            # JSONB skills may hold a legacy scalar or objects; don't 500 the whole list
+            "applicant_skills": _str_list(r.skills) if isinstance(r.skills, list) else [],
+            "has_resume": r.has_resume,
+            "resume_app_id": r.id if r.has_resume else None,
+            "applied_at": r.created_at,
+            "company": r.company or "",
         })
     return result
 
 
 # ── Interview Feedback ──────────────────────────────────────
-class FeedbackRequest(BaseModel):
+_json_decoder = json.JSONDecoder()
+
+
+def _parse_json_object(text: str) -> dict:
+    """Parse the JSON object in a model reply, tolerating fences and text around it."""
+    text = _strip_fences(text)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        # Decode from the first "{" and ignore whatever trails the object
+        start = text.find("{")
+        if start < 0:
+            raise
+        data, _ = _json_decoder.raw_decode(text, start)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    return data
+
+
+def _parse_feedback(reply: str) -> dict:
+    """Feedback fields from a model reply, coerced to what the columns store.
+
+    Scalars become strings and list items that aren't scalars are dropped; a field of the
+    wrong type altogether raises ValueError so the caller falls back to the N/A record.
+    """
+    data = _parse_json_object(reply)
+    score, summary = data.get("score", "N/A"), data.get("summary", "")
+    strengths, improvements = data.get("strengths", []), data.get("improvements", [])
+    if not (isinstance(score, _JSON_SCALARS) and isinstance(summary, _JSON_SCALARS)
+            and isinstance(strengths, list) and isinstance(improvements, list)):
+        raise ValueError("unexpected feedback shape")
+    return {
+        "score": str(score),
+        "summary": str(summary),
+        "strengths": _str_list(strengths),
+        "improvements": _str_list(improvements),
+    }
+
+
+class FeedbackRequest(RequestModel):
     application_id: str
     user_id: str
     transcript: str = ""
@@ -1147,13 +1569,12 @@ class FeedbackRequest(BaseModel):
 
 
 @app.post("/interview/feedback")
-async def generate_interview_feedback(req: FeedbackRequest, db: Session = Depends(get_db)):
+async def generate_interview_feedback(req: FeedbackRequest, db: AsyncSession = Depends(get_async_db)):
     """Generate AI feedback from an interview transcript."""
     llm = get_llm()
     if not llm or not req.transcript.strip():
         # No AI or no transcript — save minimal record
         fb = InterviewFeedback(
-            id=str(uuid.uuid4()),
             application_id=req.application_id,
             user_id=req.user_id,
             transcript=req.transcript,
@@ -1162,14 +1583,17 @@ async def generate_interview_feedback(req: FeedbackRequest, db: Session = Depend
             score="N/A",
         )
         db.add(fb)
-        db.commit()
+        await db.commit()
         return {"id": fb.id, "score": fb.score, "summary": fb.summary,
                 "strengths": [], "improvements": [], "transcript": fb.transcript,
                 "duration_seconds": fb.duration_seconds}
 
-    # Get application context
-    application = db.query(Application).filter(Application.id == req.application_id).first()
-    job_title = application.job_title if application else "the role"
+    # Get application context, then end the read transaction so no pooled
+    # connection is held while Gemini answers
+    job_title = await db.scalar(
+        select(Application.job_title).where(Application.id == req.application_id)
+    ) or "the role"
+    await db.commit()
 
     prompt = (
         f"You are an expert interview coach. Analyze this practice interview for a '{job_title}' role.\n\n"
@@ -1178,48 +1602,39 @@ async def generate_interview_feedback(req: FeedbackRequest, db: Session = Depend
         '- "score" (string): Rating out of 10, e.g. "7/10"\n'
         '- "summary" (string): 2-3 sentence overall assessment\n'
         '- "strengths" (array of strings): 3-4 specific things the candidate did well\n'
-        '- "improvements" (array of strings): 3-4 specific areas to improve\n'
-        "Return ONLY the JSON, no markdown fences."
+        '- "improvements" (array of strings): 3-4 specific areas to improve'
     )
     try:
-        response = await _invoke_with_retry(llm, prompt)
-        text = response.content.strip()
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1] if "\n" in text else text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-            text = text.strip()
-        data = json.loads(text)
+        data = await _invoke_cached(llm, prompt, _parse_feedback, max_output_tokens=FEEDBACK_MAX_TOKENS)
     except Exception as e:
         logger.error("Feedback generation error: %s", e)
         data = {"score": "N/A", "summary": "Could not generate feedback.", "strengths": [], "improvements": []}
 
     fb = InterviewFeedback(
-        id=str(uuid.uuid4()),
         application_id=req.application_id,
         user_id=req.user_id,
-        score=data.get("score", "N/A"),
-        summary=data.get("summary", ""),
-        strengths=json.dumps(data.get("strengths", [])),
-        improvements=json.dumps(data.get("improvements", [])),
+        score=data["score"],
+        summary=data["summary"],
+        strengths=data["strengths"],
+        improvements=data["improvements"],
         transcript=req.transcript,
         duration_seconds=str(req.duration_seconds),
     )
     db.add(fb)
-    db.commit()
+    await db.commit()
 
     return {
         "id": fb.id,
         "score": fb.score,
         "summary": fb.summary,
-        "strengths": data.get("strengths", []),
-        "improvements": data.get("improvements", []),
+        "strengths": data["strengths"],
+        "improvements": data["improvements"],
         "transcript": fb.transcript,
         "duration_seconds": fb.duration_seconds,
     }
 
 
-@app.get("/interview/feedback/{application_id}")
+@app.get("/interview/feedback/{application_id}", response_model=List[FeedbackItem])
 def get_interview_feedback(application_id: str, db: Session = Depends(get_db)):
     """Get all interview feedback for an application."""
     feedbacks = db.query(InterviewFeedback).filter(
@@ -1228,11 +1643,12 @@ def get_interview_feedback(application_id: str, db: Session = Depends(get_db)):
     return [
         {
             "id": f.id, "score": f.score, "summary": f.summary,
-            "strengths": json.loads(f.strengths) if f.strengths else [],
-            "improvements": json.loads(f.improvements) if f.improvements else [],
+            # Rows written before replies were normalized may hold non-string items
+            "strengths": _str_list(f.strengths) if isinstance(f.strengths, list) else [],
+            "improvements": _str_list(f.improvements) if isinstance(f.improvements, list) else [],
             "transcript": f.transcript,
             "duration_seconds": f.duration_seconds,
-            "created_at": str(f.created_at) if f.created_at else None,
+            "created_at": f.created_at,
         }
         for f in feedbacks
     ]
@@ -1256,10 +1672,8 @@ def get_notifications(user_id: str, db: Session = Depends(get_db)):
 
 @app.patch("/notifications/{notif_id}/read")
 def mark_notification_read(notif_id: str, db: Session = Depends(get_db)):
-    n = db.query(Notification).filter(Notification.id == notif_id).first()
-    if n:
-        n.read = "true"
-        db.commit()
+    db.execute(update(Notification).where(Notification.id == notif_id).values(read="true"))
+    db.commit()
     return {"message": "ok"}
 
 
@@ -1273,6 +1687,34 @@ def mark_all_read(user_id: str, db: Session = Depends(get_db)):
 
 
 # ── HR Routes ───────────────────────────────────────────────
+def _notify_matching_seekers(db: Session, req: PostJobRequest, job_tags: frozenset):
+    """Notify every seeker with a skill among job_tags (case-insensitive) about a new posting."""
+    # jsonb_array_elements_text raises on a non-array value, so skip malformed skills both in
+    # the WHERE clause and inside the subquery (Postgres doesn't promise AND evaluation order)
+    is_array = func.jsonb_typeof(User.skills) == "array"
+    skill = func.jsonb_array_elements_text(
+        case((is_array, User.skills), else_=text("'[]'::jsonb"))
+    ).table_valued("value").alias("skill")
+    has_match = select(skill.c.value).where(func.lower(skill.c.value).in_(job_tags)).exists()
+    seekers = db.execute(
+        select(User.id, User.skills).where(User.role == "seeker", is_array, has_match)
+    ).all()
+    notifs = []
+    for seeker in seekers:
+        overlap = job_tags.intersection(s.lower() for s in seeker.skills if isinstance(s, str))
+        if overlap:
+            notifs.append(dict(
+                user_id=seeker.id,
+                title=f"New job match: {req.title}",
+                body=f"{req.company} posted a {req.title} role matching your skills ({', '.join(list(overlap)[:3])}).",
+                link_page="feed",
+                read="false",
+            ))
+    if notifs:
+        db.execute(insert(Notification), notifs)
+        db.commit()
+
+
 @app.post("/hr/post-job")
 def hr_post_job(req: PostJobRequest, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == req.user_id).first()
@@ -1289,37 +1731,26 @@ def hr_post_job(req: PostJobRequest, db: Session = Depends(get_db)):
         salary=req.salary or "",
         summary=req.summary or "",
         description=req.description,
-        tags=json.dumps(req.tags or []),
+        tags=[t for t in (req.tags or []) if t],  # whitespace-only tags are stripped to ""
     )
     db.add(job)
+    job_id = job.id
+    # Commit the posting on its own so a failure while notifying can't lose it
     db.commit()
 
     # ── Notify matching seekers ──
-    job_tags = set(t.lower() for t in (req.tags or []))
+    job_tags = frozenset(t.lower() for t in (req.tags or []) if t)
     if job_tags:
-        seekers = db.query(User).filter(User.role == "seeker").all()
-        for seeker in seekers:
-            try:
-                user_skills = set(s.lower() for s in json.loads(seeker.skills or "[]"))
-            except Exception:
-                user_skills = set()
-            overlap = job_tags & user_skills
-            if overlap:
-                notif = Notification(
-                    id=str(uuid.uuid4()),
-                    user_id=seeker.id,
-                    title=f"New job match: {req.title}",
-                    body=f"{req.company} posted a {req.title} role matching your skills ({', '.join(list(overlap)[:3])}).",
-                    link_page="feed",
-                    read="false",
-                )
-                db.add(notif)
-        db.commit()
+        try:
+            _notify_matching_seekers(db, req, job_tags)
+        except Exception as e:
+            db.rollback()
+            logger.warning("Seeker notifications for %s skipped: %s", job_id, e)
 
-    return {"message": "Job posted!", "job_id": job.id}
+    return {"message": "Job posted!", "job_id": job_id}
 
 
-@app.get("/hr/my-jobs/{user_id}")
+@app.get("/hr/my-jobs/{user_id}", response_model=List[HRJobItem])
 def hr_my_jobs(user_id: str, db: Session = Depends(get_db)):
     jobs = db.query(HRJob).filter(HRJob.posted_by == user_id).order_by(HRJob.created_at.desc()).all()
     return [
@@ -1333,8 +1764,8 @@ def hr_my_jobs(user_id: str, db: Session = Depends(get_db)):
             "salary": j.salary,
             "summary": j.summary,
             "description": j.description,
-            "tags": json.loads(j.tags) if j.tags else [],
-            "created_at": str(j.created_at) if j.created_at else None,
+            "tags": j.tags or [],
+            "created_at": j.created_at,
         }
         for j in jobs
     ]
@@ -1352,6 +1783,17 @@ def hr_delete_job(job_id: str, user_id: str = Query(...), db: Session = Depends(
 
 # ── Live Audio Interview (Gemini API + Text-based) ──────────────────
 # This uses Gemini API with text messages (free solution)
+_INTERVIEW_GUIDELINES = (
+    "Guidelines:\n"
+    "- Greet the candidate warmly (do NOT introduce yourself with a name)\n"
+    "- Ask behavioral and technical questions relevant to the role\n"
+    "- Give brief, encouraging feedback on answers\n"
+    "- Keep your responses concise (under 30 seconds of speech)\n"
+    "- Be professional but friendly\n"
+    "- After 4-5 questions, wrap up with closing remarks and feedback"
+)
+
+
 @app.websocket("/ws/interview/{application_id}")
 async def interview_websocket(websocket: WebSocket, application_id: str):
     await websocket.accept()
@@ -1363,56 +1805,54 @@ async def interview_websocket(websocket: WebSocket, application_id: str):
         description = init_data.get("description", "")[:800]
 
         # 2. Try to load HR personality from DB
-        db = SessionLocal()
         personality = None
-        try:
-            if company:
-                personality = db.query(HRPersonality).filter(
-                    HRPersonality.company.ilike(f"%{company}%")
-                ).first()
-        finally:
-            db.close()
-
-        # 3. Build system instruction
+        if company:
+            async with AsyncSessionLocal() as db:
+                personality = await db.scalar(
+                    select(HRPersonality).where(HRPersonality.company.ilike(f"%{company}%")).limit(1)
+                )
+
+        # 3. Build system instruction (static guidelines first, then the persona and job)
         if personality:
-            sys_instr = (
+            persona = (
                 f"{personality.style}\n\n"
                 f"You are conducting a live practice interview with a candidate "
                 f"for the '{job_title}' role at {company}.\n"
-                f"Job description:\n{description}\n\n"
             )
         else:
-            sys_instr = (
+            persona = (
                 f"You are a professional HR interviewer at {company}. "
                 f"You are conducting a live practice interview for the '{job_title}' role.\n"
-                f"Job description:\n{description}\n\n"
             )
-        sys_instr += (
-            "Guidelines:\n"
-            "- Greet the candidate warmly (do NOT introduce yourself with a name)\n"
-            "- Ask behavioral and technical questions relevant to the role\n"
-            "- Give brief, encouraging feedback on answers\n"
-            "- Keep your responses concise (under 30 seconds of speech)\n"
-            "- Be professional but friendly\n"
-            "- After 4-5 questions, wrap up with closing remarks and feedback"
+        sys_instr = _canonical_prompt(
+            f"{_INTERVIEW_GUIDELINES}\n\n{persona}Job description:\n{description}"
         )
 
-        # 4. Initialize Gemini text-based conversation using langchain
-        from langchain_google_genai import ChatGoogleGenerativeAI
-        from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-        
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-3-pro-preview",
-            google_api_key=os.getenv("GOOGLE_API_KEY"),
-            max_retries=3,
-        )
-        
+        # 4. Text-based conversation on the shared Gemini client
+        llm = get_llm()
+        if not llm:
+            await websocket.send_json({"type": "error", "message": "AI not available – API key not configured."})
+            await websocket.close()
+            return
+
         # Start conversation with system prompt
         conversation_history = [SystemMessage(content=sys_instr)]
         question_count = [0]  # Track number of questions asked
         
         await websocket.send_json({"type": "connected"})
 
+        async def stream_reply() -> str:
+            """Stream the next interviewer turn as ai_delta messages, then send it whole."""
+            parts = []
+            async for chunk in llm.astream(conversation_history, max_output_tokens=INTERVIEW_MAX_TOKENS):
+                if chunk.text:
+                    parts.append(chunk.text)
+                    await websocket.send_json({"type": "ai_delta", "text": chunk.text})
+            reply = "".join(parts).strip()
+            conversation_history.append(AIMessage(content=reply))
+            await websocket.send_json({"type": "ai_response", "text": reply, "turn_complete": True})
+            return reply
+
         async def handle_user_message():
             """Receive transcribed text from browser and send to Gemini."""
             try:
@@ -1426,34 +1866,16 @@ async def interview_websocket(websocket: WebSocket, application_id: str):
                         # Add user message to history
                         conversation_history.append(HumanMessage(content=user_text))
                         
-                        # Get AI response from Gemini
+                        # Stream AI response from Gemini back to the browser
                         try:
-                            response = await llm.ainvoke(conversation_history)
-                            ai_response = response.content.strip()
+                            await stream_reply()
                             question_count[0] += 1
                             
-                            # Add AI response to history
-                            conversation_history.append(AIMessage(content=ai_response))
-                            
-                            # Send response back to browser (text)
-                            await websocket.send_json({
-                                "type": "ai_response",
-                                "text": ai_response,
-                                "turn_complete": True
-                            })
-                            
                             # End interview after 5 questions
                             if question_count[0] >= 5:
                                 # Get closing remarks from AI
                                 conversation_history.append(HumanMessage(content="The interview is now complete. Please thank the candidate, give brief overall feedback on their performance, and say goodbye."))
-                                closing_response = await llm.ainvoke(conversation_history)
-                                closing_text = closing_response.content.strip()
-                                
-                                await websocket.send_json({
-                                    "type": "ai_response",
-                                    "text": closing_text,
-                                    "turn_complete": True
-                                })
+                                await stream_reply()
                                 
                                 await websocket.send_json({
                                     "type": "interview_end",
@@ -1472,18 +1894,15 @@ async def interview_websocket(websocket: WebSocket, application_id: str):
         # Send initial greeting
         try:
             conversation_history.append(HumanMessage(content="Start the interview with a warm greeting. Do not introduce yourself with a name, just say hello and welcome the candidate, then ask the first interview question."))
-            greeting_response = await llm.ainvoke(conversation_history)
-            greeting_text = greeting_response.content.strip()
-            conversation_history.append(AIMessage(content=greeting_text))
+            await stream_reply()
             question_count[0] += 1
-            
-            await websocket.send_json({
-                "type": "ai_response",
-                "text": greeting_text,
-                "turn_complete": True
-            })
         except Exception as e:
             logger.error("Greeting error: %s", e)
+            # Tell the browser, or it stays in "speaking" with recognition stopped
+            await websocket.send_json({
+                "type": "error",
+                "message": "Failed to get response from AI interviewer."
+            })
         
         # Handle incoming user messages
         await handle_user_message()
@@ -12,6 +12,7 @@ export default function AudioInterview({ app, hrInfo, onClose }) {
   const [isListening, setIsListening] = useState(false);
   const [currentSpeech, setCurrentSpeech] = useState(""); // What user is currently saying
   const [isProcessing, setIsProcessing] = useState(false); // Waiting for AI response
+  const [aiCaption, setAiCaption] = useState(""); // AI reply text as it streams in
   const transcriptRef = useRef(""); // collect any text from WS
 
   const wsRef = useRef(null);
@@ -104,6 +105,7 @@ export default function AudioInterview({ app, hrInfo, onClose }) {
   const speechBufferRef = useRef("");
   const silenceTimerRef = useRef(null);
   const isWaitingForAIRef = useRef(false);
+  const aiTurnStartedRef = useRef(false); // first ai_delta of a turn replaces the caption
 
   // ── Cleanup helper ─────────────────────────────────────
   const cleanup = useCallback(() => {
@@ -311,11 +313,27 @@ export default function AudioInterview({ app, hrInfo, onClose }) {
                 
                 // Initialize speech recognition (but don't start yet - wait for AI greeting to finish)
                 initializeSpeechRecognition();
+              } else if (msg.type === "ai_delta") {
+                // Reply is streaming in – caption it live and stop listening;
+                // speech starts once the full ai_response arrives
+                setAiSpeaking(true);
+                setIsProcessing(false);
+                if (aiTurnStartedRef.current) {
+                  setAiCaption((c) => c + msg.text);
+                } else {
+                  aiTurnStartedRef.current = true;
+                  setAiCaption(msg.text);
+                }
+                if (recognitionRef.current) {
+                  try { recognitionRef.current.stop(); } catch (_) {}
+                }
               } else if (msg.type === "ai_response") {
                 console.log("🤖 AI response:", msg.text);
                 setAiSpeaking(true);
                 setIsProcessing(false);
                 setCurrentSpeech("");
+                setAiCaption(msg.text);
+                aiTurnStartedRef.current = false;
                 
                 // Stop recognition while AI is speaking
                 if (recognitionRef.current) {
@@ -330,6 +348,7 @@ export default function AudioInterview({ app, hrInfo, onClose }) {
                   isWaitingForAIRef.current = false;
                   speechBufferRef.current = "";
                   setCurrentSpeech("");
+                  setAiCaption("");
                   
                   // Start listening for user response
                   if (statusRef.current === "active" && recognitionRef.current) {
@@ -349,9 +368,23 @@ export default function AudioInterview({ app, hrInfo, onClose }) {
                   try { recognitionRef.current.stop(); } catch (_) {}
                 }
               } else if (msg.type === "error") {
+                // The reply may have failed mid-stream – drop the partial
+                // caption and hand the turn back to the user
                 setError(msg.message);
                 isWaitingForAIRef.current = false;
                 setIsProcessing(false);
+                setAiSpeaking(false);
+                setAiCaption("");
+                aiTurnStartedRef.current = false;
+                speechBufferRef.current = "";
+                setCurrentSpeech("");
+                if (statusRef.current === "active" && recognitionRef.current) {
+                  try {
+                    recognitionRef.current.start();
+                  } catch (e) {
+                    console.log("Could not start recognition:", e);
+                  }
+                }
               }
             } catch (_) {}
           }
@@ -433,6 +466,13 @@ export default function AudioInterview({ app, hrInfo, onClose }) {
             {getStatusText()}
           </div>
 
+          {/* Show what the AI is saying */}
+          {aiCaption && aiSpeaking && (
+            <div className="interview-speech-preview">
+              {aiCaption}
+            </div>
+          )}
+
           {/* Show what user is saying */}
           {currentSpeech && !aiSpeaking && (
             <div className="interview-speech-preview">
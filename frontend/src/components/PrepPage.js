@@ -76,6 +76,11 @@ export default function PrepPage({ app, userId, onBack, onGoToProfile }) {
     return () => clearInterval(interval);
   }, [polling, app.id]);
 
+  // The dashboard list omits the tailored resume — fetch the full application once
+  useEffect(() => {
+    api.get(`/application/${app.id}`).then((r) => setLiveApp((prev) => ({ ...prev, ...r.data }))).catch(() => {});
+  }, [app.id]);
+
   // Load chat history + HR personality + feedbacks once
   useEffect(() => {
     api.get(`/chat/${app.id}`).then((r) => setMessages(r.data)).catch(() => {});